@@ -1,8 +1,29 @@
 import zipfile
+import tarfile
+import gzip
+import hashlib
+import shutil
+import tempfile
 import os
+import sys
 import fnmatch
+import argparse
 import subprocess
 
+# Archive formats supported by stream_flutter_project, mapped to tarfile stream modes (None = zip).
+STREAM_FORMATS = {
+    'zip': None,
+    'tar': 'w|',
+    'tgz': 'w|gz',
+}
+
+# Deterministic mode: identical sources always produce identical archive bytes.
+DETERMINISTIC_DATE_TIME = (1980, 1, 1, 0, 0, 0)  # Earliest timestamp a zip entry can hold
+DETERMINISTIC_MTIME = 315532800  # The same instant as a Unix timestamp, for tar entries
+DETERMINISTIC_COMPRESSLEVEL = 9
+# Bumped whenever the deterministic archive layout changes, so old cache entries are not reused.
+MANIFEST_VERSION = "export-manifest-v1"
+
 def is_ignored(path, gitignore_patterns):
     """
     Checks if a file or directory should be ignored based on .gitignore patterns.
@@ -19,7 +40,7 @@ def is_ignored(path, gitignore_patterns):
             return True
     return False
 
-def read_gitignore(gitignore_path):
+def read_gitignore(gitignore_path, log=print):
     """
     Reads the .gitignore file and returns a list of patterns.
     Handles comments and empty lines.  Also expands directories
@@ -27,6 +48,7 @@ def read_gitignore(gitignore_path):
 
     Args:
         gitignore_path (str): The path to the .gitignore file.
+        log (callable): Used to report a missing .gitignore.
 
     Returns:
         list: A list of patterns from the .gitignore file.
@@ -43,18 +65,135 @@ def read_gitignore(gitignore_path):
                          pattern = os.path.join(pattern, '*')
                     patterns.append(pattern)
     except FileNotFoundError:
-        print(".gitignore file not found.  Zipping all files.")
+        log(".gitignore file not found.  Zipping all files.")
         return []
     return patterns
 
-def zip_flutter_project(project_path, output_zip_path):
+def iter_project_files(project_path, gitignore_patterns, log=print, sort=False, exclude=()):
+    """
+    Walks the project and yields (file_path, relative_path) for every file
+    not excluded by .gitignore patterns.
+
+    Args:
+        project_path (str): The path to the Flutter project directory.
+        gitignore_patterns (list): A list of patterns from the .gitignore file.
+        log (callable): Used to report added and ignored files.
+        sort (bool): Walk directories and files in sorted order.
+        exclude (iterable): Files or directories to skip, such as the archive
+            being written or the archive cache.
+    """
+    exclude = {os.path.abspath(path) for path in exclude}
+    for root, dirs, files in os.walk(project_path):
+        # Prune excluded directories so os.walk never descends into them.
+        dirs[:] = [d for d in dirs if os.path.abspath(os.path.join(root, d)) not in exclude]
+        if sort:
+            dirs.sort()
+            files = sorted(files)
+        for file in files:
+            file_path = os.path.join(root, file)
+            if os.path.abspath(file_path) in exclude:
+                continue
+            # Get relative path for checking against .gitignore and for
+            # adding to the archive.
+            relative_path = os.path.relpath(file_path, project_path)
+
+            if not is_ignored(relative_path, gitignore_patterns):
+                log(f"Adding: {relative_path}")
+                yield file_path, relative_path
+            else:
+                log(f"Ignoring: {relative_path}")
+
+def normalized_mode(file_path):
+    """Returns 0o755 for executable files and 0o644 for everything else."""
+    return 0o755 if os.stat(file_path).st_mode & 0o111 else 0o644
+
+def hash_file(file_path):
+    """Returns the SHA-256 hex digest of a file, read in chunks."""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(64 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def copy_file_atomic(src_path, dst_path):
+    """
+    Copies src_path to dst_path through a temporary file in the destination
+    directory and os.replace, so readers never see a half-written file.
+    """
+    dst_dir = os.path.dirname(os.path.abspath(dst_path))
+    fd, temp_path = tempfile.mkstemp(dir=dst_dir, prefix='.' + os.path.basename(dst_path) + '.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as dst, open(src_path, 'rb') as src:
+            shutil.copyfileobj(src, dst)
+        os.replace(temp_path, dst_path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+def compute_manifest_hash(files, archive_format):
+    """
+    Returns a SHA-256 over the archive format and every input's path, normalized
+    mode and content hash. Identical inputs give the same hash, computed without
+    compressing anything, so a cached archive can be looked up by it.
+
+    Args:
+        files (list): (file_path, relative_path) tuples in archive order.
+        archive_format (str): One of 'zip', 'tar' or 'tgz'.
+    """
+    manifest = hashlib.sha256(f"{MANIFEST_VERSION} {archive_format} level={DETERMINISTIC_COMPRESSLEVEL}\n".encode("utf-8"))
+    for file_path, relative_path in files:
+        arcname = relative_path.replace(os.sep, '/')
+        manifest.update(f"{arcname}\0{normalized_mode(file_path):o}\0{hash_file(file_path)}\n".encode("utf-8"))
+    return manifest.hexdigest()
+
+def write_deterministic_zip(files, zipf):
+    """
+    Adds files with fixed timestamps, permissions, host system and compression level.
+    Each file is streamed into its entry in chunks rather than read into memory.
+    """
+    for file_path, relative_path in files:
+        info = zipfile.ZipInfo(relative_path.replace(os.sep, '/'), DETERMINISTIC_DATE_TIME)
+        info.create_system = 3  # Unix, so permission bits mean the same on every host
+        info.external_attr = (0o100000 | normalized_mode(file_path)) << 16
+        info.compress_type = zipfile.ZIP_DEFLATED
+        # ZipInfo.compress_level is public from Python 3.13; earlier versions only have the private slot.
+        if hasattr(zipfile.ZipInfo, 'compress_level'):
+            info.compress_level = DETERMINISTIC_COMPRESSLEVEL
+        else:
+            info._compresslevel = DETERMINISTIC_COMPRESSLEVEL
+        # Known up front so zipfile picks zip64 headers for large files, as writestr would.
+        info.file_size = os.path.getsize(file_path)
+        with open(file_path, 'rb') as src, zipf.open(info, 'w') as dst:
+            shutil.copyfileobj(src, dst, 64 * 1024)
+
+def normalize_tarinfo(tarinfo, file_path):
+    """Strips timestamps, ownership and non-executable permission differences from a tar entry."""
+    tarinfo.mtime = DETERMINISTIC_MTIME
+    tarinfo.uid = tarinfo.gid = 0
+    tarinfo.uname = tarinfo.gname = ""
+    tarinfo.mode = normalized_mode(file_path)
+    return tarinfo
+
+def zip_flutter_project(project_path, output_zip_path, deterministic=False, cache_dir=None):
     """
     Creates a zip archive of a Flutter project, excluding files and directories
     specified in .gitignore.
 
+    In deterministic mode, entries are sorted and timestamps, permissions and the
+    compression level are fixed, so identical sources give byte-identical zips.
+    A manifest hash of the inputs is computed before compressing and written,
+    with the SHA-256 of the resulting zip, to '<output_zip_path>.manifest'.
+    If the existing output still matches both hashes, or '<cache_dir>/<hash>.zip'
+    exists, it is reused and compression is skipped. A plain (non-deterministic)
+    export removes the manifest, since its zip no longer matches it.
+
     Args:
         project_path (str): The path to the Flutter project directory.
         output_zip_path (str): The path to the output zip file.
+        deterministic (bool): Build a reproducible archive with a manifest hash.
+        cache_dir (str, optional): Directory of archives named by manifest hash.
+            Implies deterministic.
     """
     if not os.path.exists(project_path):
         print(f"Error: Project path '{project_path}' does not exist.")
@@ -62,26 +201,143 @@ def zip_flutter_project(project_path, output_zip_path):
 
     gitignore_path = os.path.join(project_path, '.gitignore')
     gitignore_patterns = read_gitignore(gitignore_path)
+    manifest_path = output_zip_path + '.manifest'
+    files = iter_project_files(project_path, gitignore_patterns, sort=deterministic or bool(cache_dir),
+                               exclude=(output_zip_path, manifest_path) + ((cache_dir,) if cache_dir else ()))
+
+    if not (deterministic or cache_dir):
+        with zipfile.ZipFile(output_zip_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
+            for file_path, relative_path in files:
+                zipf.write(file_path, relative_path)
+        if os.path.exists(manifest_path):
+            os.remove(manifest_path)  # Describes a deterministic zip that was just overwritten
+        print(f"Successfully created zip file: {output_zip_path}")
+        return
 
-    with zipfile.ZipFile(output_zip_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-        for root, _, files in os.walk(project_path):
-            for file in files:
-                file_path = os.path.join(root, file)
-                # Get relative path for checking against .gitignore and for
-                # adding to the zip file.
-                relative_path = os.path.relpath(file_path, project_path)
+    files = list(files)
+    manifest_hash = compute_manifest_hash(files, 'zip')
+    print(f"Manifest hash: {manifest_hash}")
+    cached_zip_path = os.path.join(cache_dir, manifest_hash + '.zip') if cache_dir else None
 
-                if not is_ignored(relative_path, gitignore_patterns):
-                    zipf.write(file_path, relative_path)
-                    print(f"Adding: {relative_path}")
-                else:
-                    print(f"Ignoring: {relative_path}")
+    # The manifest holds "<manifest hash> <zip sha256>"; the zip itself must still match it.
+    previous = []
+    if os.path.exists(output_zip_path) and os.path.exists(manifest_path):
+        with open(manifest_path, 'r') as f:
+            previous = f.read().split()
+    if len(previous) == 2 and previous[0] == manifest_hash and previous[1] == hash_file(output_zip_path):
+        print(f"Inputs unchanged, reusing existing zip file: {output_zip_path}")
+    elif cached_zip_path and os.path.exists(cached_zip_path):
+        copy_file_atomic(cached_zip_path, output_zip_path)
+        print(f"Cache hit, copied {cached_zip_path} to: {output_zip_path}")
+    else:
+        with zipfile.ZipFile(output_zip_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
+            write_deterministic_zip(files, zipf)
+        print(f"Successfully created deterministic zip file: {output_zip_path}")
 
-    print(f"Successfully created zip file: {output_zip_path}")
+    with open(manifest_path, 'w') as f:
+        f.write(f"{manifest_hash} {hash_file(output_zip_path)}\n")
+    if cached_zip_path and not os.path.exists(cached_zip_path):
+        os.makedirs(cache_dir, exist_ok=True)
+        copy_file_atomic(output_zip_path, cached_zip_path)
+        print(f"Stored in cache: {cached_zip_path}")
+
+def stream_flutter_project(project_path, output_stream, archive_format='zip', log=None, deterministic=False):
+    """
+    Writes an archive of a Flutter project to a (possibly non-seekable) binary
+    stream such as stdout or a pipe, excluding files specified in .gitignore.
+    Each file is compressed and written as soon as it is read, so the consumer
+    can start transferring before the archive is complete. Zip entries use data
+    descriptors when the stream cannot seek; tar formats are written as streams.
+
+    Args:
+        project_path (str): The path to the Flutter project directory.
+        output_stream: A writable binary file object.
+        archive_format (str): One of 'zip', 'tar' or 'tgz'.
+        log (callable): Progress output; defaults to stderr so stdout stays clean.
+        deterministic (bool): Sort entries and fix timestamps, permissions and
+            compression level; the manifest hash of the inputs is logged first.
+
+    Returns:
+        bool: True if the archive was written, False otherwise.
+    """
+    if log is None:
+        log = lambda message: print(message, file=sys.stderr)
+
+    if archive_format not in STREAM_FORMATS:
+        log(f"Error: Unknown archive format '{archive_format}'. Choose from: {', '.join(STREAM_FORMATS)}.")
+        return False
+    if not os.path.exists(project_path):
+        log(f"Error: Project path '{project_path}' does not exist.")
+        return False
+
+    gitignore_path = os.path.join(project_path, '.gitignore')
+    gitignore_patterns = read_gitignore(gitignore_path, log)
+    files = iter_project_files(project_path, gitignore_patterns, log, sort=deterministic)
+
+    tar_mode = STREAM_FORMATS[archive_format]
+    if deterministic:
+        files = list(files)
+        log(f"Manifest hash: {compute_manifest_hash(files, archive_format)}")
+        if tar_mode is None:
+            with zipfile.ZipFile(output_stream, 'w', zipfile.ZIP_DEFLATED) as zipf:
+                write_deterministic_zip(files, zipf)
+        else:
+            # tarfile's own gzip stream stamps the current time into its header, so gzip it here.
+            gz = None
+            if archive_format == 'tgz':
+                gz = gzip.GzipFile(filename='', mode='wb', fileobj=output_stream,
+                                   compresslevel=DETERMINISTIC_COMPRESSLEVEL, mtime=0)
+            with tarfile.open(fileobj=gz or output_stream, mode='w|', format=tarfile.PAX_FORMAT) as tarf:
+                for file_path, relative_path in files:
+                    tarinfo = tarf.gettarinfo(file_path, relative_path.replace(os.sep, '/'))
+                    with open(file_path, 'rb') as f:
+                        tarf.addfile(normalize_tarinfo(tarinfo, file_path), f)
+            if gz is not None:
+                gz.close()
+    elif tar_mode is None:
+        with zipfile.ZipFile(output_stream, 'w', zipfile.ZIP_DEFLATED) as zipf:
+            for file_path, relative_path in files:
+                zipf.write(file_path, relative_path)
+    else:
+        with tarfile.open(fileobj=output_stream, mode=tar_mode) as tarf:
+            for file_path, relative_path in files:
+                tarf.add(file_path, relative_path.replace(os.sep, '/'), recursive=False)
+
+    output_stream.flush()
+    log(f"Successfully streamed {archive_format} archive of: {project_path}")
+    return True
 
 if __name__ == "__main__":
-    # Get the project path and output zip path.  You can change these,
-    # or make them command-line arguments.
-    project_path = '.'  # Current directory (where the script is run)
-    output_zip_path = 'flutter_project.zip'
-    zip_flutter_project(project_path, output_zip_path)
+    parser = argparse.ArgumentParser(
+        description="Archive a Flutter project, excluding files listed in .gitignore.",
+        formatter_class=argparse.RawTextHelpFormatter
+    )
+    parser.add_argument("project_path", nargs="?", default=".",
+                        help="The Flutter project directory (default: current directory).")
+    parser.add_argument("-o", "--output", default="flutter_project.zip",
+                        help="The output zip file (default: flutter_project.zip). Ignored with --stream.")
+    parser.add_argument("--stream", action="store_true",
+                        help="Write the archive to stdout while files are read, e.g.\n"
+                             "  python export.py --stream | ssh builder 'cat > project.zip'\n"
+                             "Progress messages go to stderr.")
+    parser.add_argument("--format", choices=sorted(STREAM_FORMATS), default=None,
+                        help="Archive format for --stream (default: zip). Requires --stream.")
+    parser.add_argument("--deterministic", action="store_true",
+                        help="Build a reproducible archive: sorted entries, fixed timestamps,\n"
+                             "permissions and compression level, plus a manifest hash of the inputs\n"
+                             "(written to OUTPUT.manifest, or to stderr with --stream).")
+    parser.add_argument("--cache-dir", default=None,
+                        help="Reuse '<manifest hash>.zip' from this directory instead of compressing,\n"
+                             "and store new archives there. Implies --deterministic; not allowed with --stream.")
+    args = parser.parse_args()
+    if args.format is not None and not args.stream:
+        parser.error("--format requires --stream; without it a zip is always written to --output")
+    if args.cache_dir and args.stream:
+        parser.error("--cache-dir cannot be used with --stream; use --deterministic for a reproducible stream")
+
+    if args.stream:
+        if not stream_flutter_project(args.project_path, sys.stdout.buffer, args.format or 'zip',
+                                      deterministic=args.deterministic):
+            sys.exit(1)
+    else:
+        zip_flutter_project(args.project_path, args.output, args.deterministic, args.cache_dir)
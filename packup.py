@@ -1,6 +1,11 @@
 import os
+import re
+import sys
+import json
 import fnmatch
+import hashlib
 import argparse
+import posixpath
 
 # --- Configuration ---
 DEFAULT_OUTPUT_FILENAME = "project_snapshot.txt"
@@ -48,6 +53,30 @@ ADDITIONAL_IGNORE_PATTERNS = [
     # Note: Rely on project's .gitignore for most build artifacts like 'build/',
     # 'ios/Pods/', 'android/.gradle/' as they can be configured differently.
 ]
+# Size policies for large text files, matched in order against paths relative to root_dir
+# (full path or basename, like ignore patterns). Each entry is (pattern, action, size_kb):
+#   "include"   - always pack the file in full.
+#   "truncate"  - if larger than 2 * size_kb KB, keep only the first and last size_kb KB.
+#   "summarize" - if larger than size_kb KB, pack only its size and SHA-256 (0 = always).
+# The first matching pattern wins; files matching no pattern are packed in full.
+DEFAULT_SIZE_POLICIES = [
+    ("pubspec.lock", "summarize", 0),
+    ("*.g.dart", "summarize", 0),
+    ("*.freezed.dart", "summarize", 0),
+    ("*.log", "truncate", 8),
+    ("*.json", "truncate", 32),
+    ("*", "truncate", 256),
+]
+SIZE_POLICY_ACTIONS = ("include", "truncate", "summarize")
+# Markers written in place of omitted content. update.py refuses to apply entries carrying them.
+TRUNCATED_MARKER = "[... packup: truncated {omitted} of {size} bytes ...]"
+SUMMARY_MARKER = "[packup: summarized, size={size} bytes, sha256={digest}]"
+# Dart import graph used by --reachable-from. Directives are found with a line-level scan:
+# `import 'x';`, `export 'x';`, `part 'x';` and conditional `if (...) 'y'` alternatives.
+DART_DIRECTIVE_RE = re.compile(r"""^\s*(?:import|export|part)\s+(['"])(.+?)\1""")
+DART_CONDITIONAL_URI_RE = re.compile(r"""\bif\s*\([^)]*\)\s*(['"])(.+?)\1""")
+# Per-file dependency cache, keyed by path and invalidated by mtime/size. Relative to root_dir.
+IMPORT_GRAPH_CACHE_FILENAME = ".dart_tool/packup_import_graph.json"
 
 def load_gitignore_patterns(root_dir):
     """Loads patterns from .gitignore file in the root directory."""
@@ -180,34 +209,239 @@ def is_likely_binary_file(filepath, binary_extensions):
         return True # Assume binary or problematic
     return False
 
+def find_size_policy(path_relative_to_root, size_policies):
+    """Returns the first (pattern, action, size_kb) policy matching the path, or None."""
+    path_to_check = path_relative_to_root.replace(os.sep, "/")
+    for policy in size_policies:
+        pattern = policy[0]
+        if fnmatch.fnmatch(path_to_check, pattern) or fnmatch.fnmatch(os.path.basename(path_to_check), pattern):
+            return policy
+    return None
+
+def hash_file(filepath, chunk_size=64 * 1024):
+    """Returns the SHA-256 hex digest of a file, reading it in fixed-size chunks."""
+    digest = hashlib.sha256()
+    with open(filepath, "rb") as f_bin:
+        for chunk in iter(lambda: f_bin.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def utf8_sequence_length(lead_byte):
+    """Returns the byte length of the UTF-8 sequence started by lead_byte (1 for ASCII/invalid)."""
+    if lead_byte >= 0xF0:
+        return 4
+    if lead_byte >= 0xE0:
+        return 3
+    if lead_byte >= 0xC0:
+        return 2
+    return 1
+
+def trim_to_utf8_boundaries(head, tail):
+    """Drops a UTF-8 sequence cut off at the end of head and continuation bytes at the start of tail."""
+    for i in range(len(head) - 1, max(len(head) - 5, -1), -1):
+        if head[i] & 0xC0 != 0x80: # Found the lead byte of the last sequence
+            if len(head) - i < utf8_sequence_length(head[i]):
+                head = head[:i]
+            break
+    skip = 0
+    while skip < min(3, len(tail)) and tail[skip] & 0xC0 == 0x80:
+        skip += 1
+    return head, tail[skip:]
+
+def read_head_tail(filepath, file_size, sample_bytes):
+    """
+    Reads the first and last sample_bytes of a file by seeking, without reading the middle.
+    Both samples are trimmed to whole lines, or to whole UTF-8 characters when a sample
+    has no newline (e.g. minified JSON), so no line or multi-byte character is cut.
+    Returns (head_text, omitted_byte_count, tail_text).
+    """
+    with open(filepath, "rb") as f_bin:
+        head = f_bin.read(sample_bytes)
+        f_bin.seek(max(file_size - sample_bytes, len(head)))
+        tail = f_bin.read()
+    if b"\n" in head:
+        head = head[:head.rfind(b"\n") + 1]
+    if b"\n" in tail:
+        tail = tail[tail.find(b"\n") + 1:]
+    head, tail = trim_to_utf8_boundaries(head, tail)
+    omitted = file_size - len(head) - len(tail)
+    return head.decode("utf-8", errors="replace"), omitted, tail.decode("utf-8", errors="replace")
+
+def read_file_for_pack(filepath_abs, filepath_rel_to_root, size_policies):
+    """
+    Reads a text file for packing, applying the first matching size policy.
+    Returns (content, action) where action is "include", "truncate" or "summarize".
+    """
+    file_size = os.path.getsize(filepath_abs)
+    policy = find_size_policy(filepath_rel_to_root, size_policies)
+    if policy is not None:
+        _, action, size_kb = policy
+        limit = int(size_kb * 1024)
+        if action == "summarize" and file_size > limit:
+            return SUMMARY_MARKER.format(size=file_size, digest=hash_file(filepath_abs)), action
+        if action == "truncate" and limit > 0 and file_size > 2 * limit:
+            head, omitted, tail = read_head_tail(filepath_abs, file_size, limit)
+            if omitted > 0:
+                # The marker always gets its own line, even when the head has no newline (e.g. minified JSON).
+                marker = TRUNCATED_MARKER.format(omitted=omitted, size=file_size)
+                separator = "" if not head or head.endswith("\n") else "\n"
+                return f"{head}{separator}{marker}\n{tail}", action
+
+    with open(filepath_abs, "r", encoding="utf-8", errors="replace") as f_in:
+        return f_in.read(), "include"
+
+def read_pubspec_name(root_dir):
+    """Returns the package name from pubspec.yaml, or None if it can't be found."""
+    try:
+        with open(os.path.join(root_dir, "pubspec.yaml"), "r", encoding="utf-8") as f:
+            for line in f:
+                match = re.match(r"name:\s*([A-Za-z0-9_]+)", line)
+                if match:
+                    return match.group(1)
+    except OSError:
+        pass
+    return None
+
+def scan_dart_directives(filepath):
+    """Returns the URIs of all import/export/part directives in a Dart file, in order."""
+    uris = []
+    with open(filepath, "r", encoding="utf-8", errors="replace") as f:
+        for line in f:
+            match = DART_DIRECTIVE_RE.match(line)
+            if not match:
+                continue
+            uris.append(match.group(2))
+            uris.extend(m.group(2) for m in DART_CONDITIONAL_URI_RE.finditer(line, match.end()))
+    return uris
 
-def pack_project(root_dir, output_filename, binary_extensions, additional_ignores_config):
-    """Packs all relevant files into a single text file."""
-    gitignore_patterns = load_gitignore_patterns(root_dir)
-    all_packed_content = []
-    
-    # Determine absolute path of output file. Resolve root_dir to be absolute first.
+def resolve_dart_uri(uri, from_path, package_name):
+    """
+    Resolves a directive URI to a path relative to the project root, or None for
+    dart: libraries, other packages and paths that leave the project.
+    """
+    if uri.startswith("dart:"):
+        return None
+    if uri.startswith("package:"):
+        package, _, rest = uri[len("package:"):].partition("/")
+        if package != package_name or not rest:
+            return None
+        return posixpath.normpath(posixpath.join("lib", rest))
+    if ":" in uri:
+        return None
+    resolved = posixpath.normpath(posixpath.join(posixpath.dirname(from_path), uri))
+    return None if resolved.startswith("../") else resolved
+
+def find_reachable_files(root_dir, entry_path, log=print):
+    """
+    Returns the set of project-relative paths reachable from a Dart entry file through
+    import/export/part directives, plus the entry file itself and pubspec.yaml.
+    Scanned dependencies are cached in IMPORT_GRAPH_CACHE_FILENAME by file mtime and size,
+    so only files changed since the last run are re-read.
+    Raises FileNotFoundError if the entry file does not exist; missing imports only warn.
+    """
     abs_root_dir = os.path.abspath(root_dir)
-    output_filepath_abs = os.path.join(abs_root_dir, output_filename)
+    cache_path = os.path.join(abs_root_dir, IMPORT_GRAPH_CACHE_FILENAME)
+    package_name = read_pubspec_name(abs_root_dir)
 
-    # Add the output file itself to dynamic additional ignores to prevent packing itself.
-    # This needs to be relative to root_dir for matching.
-    # If output_filename contains path separators, use it as is.
-    # If root_dir is "." and output is "out/foo.txt", rel_output_path is "out/foo.txt".
-    # If root_dir is "src" and output is "foo.txt", output_filepath_abs is ".../src/foo.txt".
-    # The matching logic uses paths relative to the walked root_dir.
-    rel_output_path_for_ignore = os.path.relpath(output_filepath_abs, abs_root_dir)
-    
-    dynamic_additional_ignores = list(additional_ignores_config) # Make a mutable copy
-    dynamic_additional_ignores.append(rel_output_path_for_ignore.replace(os.sep, "/"))
+    cache = {}
+    try:
+        with open(cache_path, "r", encoding="utf-8") as f:
+            cached = json.load(f)
+        if cached.get("package") == package_name:
+            cache = cached.get("files", {})
+    except (OSError, ValueError):
+        pass
+    cache_dirty = False
+
+    entry_rel = os.path.relpath(os.path.abspath(os.path.join(abs_root_dir, entry_path)), abs_root_dir)
+    entry_rel = entry_rel.replace(os.sep, "/")
+    if not os.path.isfile(os.path.join(abs_root_dir, entry_rel)):
+        raise FileNotFoundError(f"Entry file '{entry_path}' not found under {abs_root_dir}")
+    reachable = set()
+    pending = [entry_rel]
+    while pending:
+        rel_path = pending.pop()
+        if rel_path in reachable:
+            continue
+        abs_path = os.path.join(abs_root_dir, rel_path)
+        try:
+            stat = os.stat(abs_path)
+        except OSError:
+            log(f"  Warning: Dart file not found (referenced in import graph): {rel_path}")
+            continue
+        reachable.add(rel_path)
 
-    files_packed_count = 0
-    files_ignored_count = 0
-    dirs_ignored_count = 0
+        entry = cache.get(rel_path)
+        if entry is None or entry.get("mtime_ns") != stat.st_mtime_ns or entry.get("size") != stat.st_size:
+            try:
+                uris = scan_dart_directives(abs_path)
+            except OSError as e:
+                log(f"  Warning: Could not scan {rel_path} for imports: {e}")
+                uris = []
+            entry = {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size, "uris": uris}
+            cache[rel_path] = entry
+            cache_dirty = True
+
+        for uri in entry["uris"]:
+            dep = resolve_dart_uri(uri, rel_path, package_name)
+            if dep and dep not in reachable:
+                pending.append(dep)
+
+    if cache_dirty:
+        try:
+            os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+            with open(cache_path, "w", encoding="utf-8") as f:
+                json.dump({"package": package_name, "files": cache}, f)
+        except OSError as e:
+            log(f"  Warning: Could not write import graph cache {cache_path}: {e}")
+
+    if os.path.exists(os.path.join(abs_root_dir, "pubspec.yaml")):
+        reachable.add("pubspec.yaml")
+    return reachable
+
+def parse_size_policy(spec):
+    """Parses a 'PATTERN=ACTION[:KB]' command-line spec into a (pattern, action, size_kb) tuple."""
+    pattern, sep, rule = spec.rpartition("=")
+    if not sep or not pattern:
+        raise argparse.ArgumentTypeError(f"invalid size policy '{spec}', expected PATTERN=ACTION[:KB]")
+    action, _, size_kb = rule.partition(":")
+    if action not in SIZE_POLICY_ACTIONS:
+        raise argparse.ArgumentTypeError(f"invalid size policy action '{action}', choose from {', '.join(SIZE_POLICY_ACTIONS)}")
+    try:
+        size_kb = float(size_kb) if size_kb else 0
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid size in size policy '{spec}'")
+    if size_kb < 0 or (action == "truncate" and size_kb == 0):
+        raise argparse.ArgumentTypeError(f"invalid size in size policy '{spec}', truncate needs a size above 0 KB")
+    return pattern, action, size_kb
 
-    print(f"Starting project pack-up from: {abs_root_dir}")
-    print(f"Output will be: {output_filepath_abs}")
-    print(f"Ignoring output file pattern: {rel_output_path_for_ignore.replace(os.sep, '/')}")
+
+def iter_pack_entries(root_dir, binary_extensions=DEFAULT_BINARY_EXTENSIONS,
+                      additional_ignores_config=ADDITIONAL_IGNORE_PATTERNS, size_policies=(),
+                      stats=None, log=print, only_paths=None):
+    """
+    Walks root_dir and yields (header_path, content) for every file that should be packed.
+    Nothing is written to disk. If stats is a dict, it is filled with packed/ignored counts.
+    No size policies are applied unless passed in (e.g. DEFAULT_SIZE_POLICIES), so entries are
+    lossless by default. Truncated or summarized entries are skipped by update.apply_snapshot,
+    so only opt in when the output is meant for reading rather than applying.
+    Progress messages go through log (pass a no-op to silence them).
+    If only_paths is given (e.g. from find_reachable_files), files outside it are skipped
+    and directories containing none of them are not walked.
+    """
+    abs_root_dir = os.path.abspath(root_dir)
+    gitignore_patterns = load_gitignore_patterns(abs_root_dir)
+    if stats is None:
+        stats = {}
+    for key in ("files_packed", "files_ignored", "dirs_ignored", "files_truncated", "files_summarized"):
+        stats.setdefault(key, 0)
+    only_dirs = None
+    if only_paths is not None:
+        only_dirs = {posixpath.dirname(path) for path in only_paths}
+        for path in list(only_dirs):
+            while path:
+                path = posixpath.dirname(path)
+                only_dirs.add(path)
 
     for dirpath, dirnames, filenames in os.walk(abs_root_dir, topdown=True):
         # Path of current directory relative to the initial root_dir for should_ignore
@@ -217,12 +451,13 @@ def pack_project(root_dir, output_filename, binary_extensions, additional_ignore
 
 
         # Modify dirnames in-place to prevent os.walk from descending into ignored dirs
-        original_dirnames_len = len(dirnames)
         dirs_to_remove_from_walk = []
         for dname in dirnames:
             # Construct path relative to root_dir for should_ignore
             dir_rel_path = os.path.join(current_walk_dir_rel_to_root, dname)
-            if should_ignore(dir_rel_path, gitignore_patterns, dynamic_additional_ignores, is_dir=True):
+            if should_ignore(dir_rel_path, gitignore_patterns, additional_ignores_config, is_dir=True):
+                dirs_to_remove_from_walk.append(dname)
+            elif only_dirs is not None and dir_rel_path.replace(os.sep, "/") not in only_dirs:
                 dirs_to_remove_from_walk.append(dname)
         
         if dirs_to_remove_from_walk:
@@ -230,47 +465,104 @@ def pack_project(root_dir, output_filename, binary_extensions, additional_ignore
                 dirnames.remove(dname_to_remove)
                 # Path for logging should be relative to initial root_dir
                 log_path = os.path.join(current_walk_dir_rel_to_root, dname_to_remove)
-                print(f"  Ignoring directory (and its contents): {log_path.replace(os.sep, '/')}")
-                dirs_ignored_count +=1
+                log(f"  Ignoring directory (and its contents): {log_path.replace(os.sep, '/')}")
+                stats["dirs_ignored"] += 1
 
         for filename in filenames:
             filepath_abs = os.path.join(dirpath, filename)
             # Path relative to root_dir for should_ignore and for header
             filepath_rel_to_root = os.path.join(current_walk_dir_rel_to_root, filename)
+            header_path = filepath_rel_to_root.replace(os.sep, "/")
 
-            # This specific check for output_filepath_abs is a safeguard,
-            # but dynamic_additional_ignores should also catch it via should_ignore.
-            if filepath_abs == output_filepath_abs:
+            if only_paths is not None and header_path not in only_paths:
+                stats["files_ignored"] += 1
                 continue
 
-            if should_ignore(filepath_rel_to_root, gitignore_patterns, dynamic_additional_ignores, is_dir=False):
-                print(f"  Ignoring file (rule): {filepath_rel_to_root.replace(os.sep, '/')}")
-                files_ignored_count += 1
+            if should_ignore(filepath_rel_to_root, gitignore_patterns, additional_ignores_config, is_dir=False):
+                log(f"  Ignoring file (rule): {header_path}")
+                stats["files_ignored"] += 1
                 continue
 
             if is_likely_binary_file(filepath_abs, binary_extensions):
-                print(f"  Ignoring file (binary): {filepath_rel_to_root.replace(os.sep, '/')}")
-                files_ignored_count += 1
+                log(f"  Ignoring file (binary): {header_path}")
+                stats["files_ignored"] += 1
                 continue
 
             try:
-                with open(filepath_abs, "r", encoding="utf-8", errors="replace") as f_in:
-                    content = f_in.read()
-                
-                header_path = filepath_rel_to_root.replace(os.sep, "/")
-                all_packed_content.append(f"--- START OF FILE {header_path} ---")
-                all_packed_content.append(content)
-                all_packed_content.append(f"--- END OF FILE {header_path} ---\n")
-                print(f"  Packing file: {header_path}")
-                files_packed_count += 1
+                content, action = read_file_for_pack(filepath_abs, filepath_rel_to_root, size_policies)
             except Exception as e:
-                print(f"  Error reading file {filepath_rel_to_root.replace(os.sep, '/')}: {e}")
+                log(f"  Error reading file {header_path}: {e}")
                 # Still add a placeholder for files that couldn't be read
-                header_path_err = filepath_rel_to_root.replace(os.sep, "/")
-                all_packed_content.append(f"--- START OF FILE {header_path_err} ---")
-                all_packed_content.append(f"[Error reading file: {e}]")
-                all_packed_content.append(f"--- END OF FILE {header_path_err} ---\n")
-                files_ignored_count +=1 # Count as ignored due to error
+                stats["files_ignored"] += 1 # Count as ignored due to error
+                yield header_path, f"[Error reading file: {e}]"
+                continue
+
+            if action == "truncate":
+                log(f"  Packing file (truncated): {header_path}")
+                stats["files_truncated"] += 1
+            elif action == "summarize":
+                log(f"  Packing file (summarized): {header_path}")
+                stats["files_summarized"] += 1
+            else:
+                log(f"  Packing file: {header_path}")
+            stats["files_packed"] += 1
+            yield header_path, content
+
+def write_pack_entries(entries, stream):
+    """
+    Writes (header_path, content) entries to a binary stream in snapshot format, one at a time.
+    The output is identical to the file written by pack_project. Returns the number of entries written.
+    """
+    count = 0
+    for header_path, content in entries:
+        block = f"--- START OF FILE {header_path} ---\n{content}\n--- END OF FILE {header_path} ---\n"
+        if count:
+            block = "\n" + block
+        stream.write(block.encode("utf-8"))
+        count += 1
+    return count
+
+def pack_project(root_dir, output_filename, binary_extensions, additional_ignores_config, size_policies=(),
+                 reachable_from=None):
+    """
+    Packs all relevant files into a single text file.
+    Large text files are included, truncated or summarized according to size_policies.
+    If reachable_from names a Dart file, only its import graph and pubspec.yaml are packed.
+    Returns True if the output file was written, False otherwise.
+    """
+    # Determine absolute path of output file. Resolve root_dir to be absolute first.
+    abs_root_dir = os.path.abspath(root_dir)
+    output_filepath_abs = os.path.join(abs_root_dir, output_filename)
+
+    # Add the output file itself to dynamic additional ignores to prevent packing itself.
+    # This needs to be relative to root_dir for matching.
+    # If output_filename contains path separators, use it as is.
+    # If root_dir is "." and output is "out/foo.txt", rel_output_path is "out/foo.txt".
+    # If root_dir is "src" and output is "foo.txt", output_filepath_abs is ".../src/foo.txt".
+    # The matching logic uses paths relative to the walked root_dir.
+    rel_output_path_for_ignore = os.path.relpath(output_filepath_abs, abs_root_dir)
+    
+    dynamic_additional_ignores = list(additional_ignores_config) # Make a mutable copy
+    dynamic_additional_ignores.append(rel_output_path_for_ignore.replace(os.sep, "/"))
+    # The snapshot is written to a temporary file first and then renamed over the output,
+    # so readers that mmap the old snapshot (snapshot_server.py) never see it truncated.
+    temp_output_filepath_abs = output_filepath_abs + ".tmp"
+    dynamic_additional_ignores.append(rel_output_path_for_ignore.replace(os.sep, "/") + ".tmp")
+
+    stats = {}
+
+    print(f"Starting project pack-up from: {abs_root_dir}")
+    print(f"Output will be: {output_filepath_abs}")
+    print(f"Ignoring output file pattern: {rel_output_path_for_ignore.replace(os.sep, '/')}")
+
+    only_paths = None
+    if reachable_from:
+        try:
+            only_paths = find_reachable_files(abs_root_dir, reachable_from)
+        except FileNotFoundError as e:
+            print(f"\nError: {e}")
+            return False
+        print(f"Packing only the {len(only_paths)} files reachable from: {reachable_from}")
 
     try:
         # Ensure parent directory for output file exists if specified like "out/snapshot.txt"
@@ -278,15 +570,23 @@ def pack_project(root_dir, output_filename, binary_extensions, additional_ignore
         if output_dir:
             os.makedirs(output_dir, exist_ok=True)
 
-        with open(output_filepath_abs, "w", encoding="utf-8") as f_out:
-            f_out.write("\n".join(all_packed_content))
+        # Entries are streamed straight to the output file instead of being collected in memory.
+        with open(temp_output_filepath_abs, "wb") as f_out:
+            write_pack_entries(iter_pack_entries(abs_root_dir, binary_extensions, dynamic_additional_ignores,
+                                                 size_policies, stats, only_paths=only_paths), f_out)
+        os.replace(temp_output_filepath_abs, output_filepath_abs)
         print(f"\nSuccessfully packed project into: {output_filepath_abs}")
-        print(f"  Files packed: {files_packed_count}")
-        print(f"  Files ignored/skipped: {files_ignored_count}")
-        print(f"  Directories ignored (pruned from walk): {dirs_ignored_count}")
+        print(f"  Files packed: {stats['files_packed']}")
+        print(f"    of which truncated: {stats['files_truncated']}, summarized: {stats['files_summarized']}")
+        print(f"  Files ignored/skipped: {stats['files_ignored']}")
+        print(f"  Directories ignored (pruned from walk): {stats['dirs_ignored']}")
+        return True
 
     except Exception as e:
         print(f"\nError writing output file {output_filepath_abs}: {e}")
+        if os.path.exists(temp_output_filepath_abs):
+            os.remove(temp_output_filepath_abs)
+        return False
 
 
 if __name__ == "__main__":
@@ -304,6 +604,18 @@ if __name__ == "__main__":
                         help="Space-separated list of binary extensions to skip (e.g., .png .jpg).\n"
                              "Overrides default list if provided. Use 'none' for no extension-based skipping.\n"
                              "Default list includes common image, audio, video, archive, and compiled formats.")
+    parser.add_argument("--size-policy", action="append", type=parse_size_policy, default=None,
+                        metavar="PATTERN=ACTION[:KB]",
+                        help="Size policy for large text files; repeat for several. First match wins.\n"
+                             "ACTION is 'include', 'truncate' (keep head/tail KB each) or 'summarize'\n"
+                             "(size and SHA-256 only, when larger than KB). Replaces the default policies,\n"
+                             "e.g. --size-policy 'pubspec.lock=summarize' --size-policy '*.json=truncate:16'.")
+    parser.add_argument("--no-size-policies", action="store_true",
+                        help="Pack every text file in full, ignoring size policies.")
+    parser.add_argument("--reachable-from", metavar="FILE", default=None,
+                        help="Pack only pubspec.yaml and the Dart files reachable from FILE\n"
+                             "(e.g. lib/main.dart) through import/export/part directives.\n"
+                             f"The scanned graph is cached in {IMPORT_GRAPH_CACHE_FILENAME}.")
     
     args = parser.parse_args()
 
@@ -315,6 +627,14 @@ if __name__ == "__main__":
     else: # User provided custom list
         binary_extensions_to_use = {ext.lower() if ext.startswith('.') else '.' + ext.lower() for ext in args.skip_binary_exts}
 
+    # Determine size policies to use
+    if args.no_size_policies:
+        size_policies_to_use = []
+    elif args.size_policy:
+        size_policies_to_use = args.size_policy
+    else:
+        size_policies_to_use = DEFAULT_SIZE_POLICIES
+
     # Determine the root directory for scanning (make it absolute)
     project_root_dir = os.path.abspath(args.root_dir)
 
@@ -329,4 +649,6 @@ if __name__ == "__main__":
     # The pack_project handles this correctly by joining its `abs_root_dir` with `output_filename`
     # only if output_filename is not absolute.
 
-    pack_project(project_root_dir, output_file_name_or_path, binary_extensions_to_use, ADDITIONAL_IGNORE_PATTERNS)
\ No newline at end of file
+    if not pack_project(project_root_dir, output_file_name_or_path, binary_extensions_to_use, ADDITIONAL_IGNORE_PATTERNS,
+                        size_policies_to_use, args.reachable_from):
+        sys.exit(1)
\ No newline at end of file
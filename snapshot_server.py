@@ -0,0 +1,261 @@
+import os
+import sys
+import json
+import mmap
+import stat
+import fnmatch
+import hashlib
+import argparse
+import functools
+import threading
+import socketserver
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+from update import SNAPSHOT_FILE, index_snapshot_lines, decode_snapshot_content
+
+# --- Configuration ---
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+# Number of decoded file contents kept in memory between queries.
+DEFAULT_CACHE_SIZE = 256
+# --- End Configuration ---
+
+class SnapshotUnavailableError(Exception):
+    """Raised when no snapshot could ever be loaded, so there is nothing to serve."""
+
+
+class SnapshotIndex:
+    """
+    A snapshot file loaded once and queried many times.
+    The file is mmapped and indexed as path -> (content_start, content_end) with
+    update.index_snapshot, so a lookup is a dictionary hit plus a slice; decoded
+    contents are kept in an LRU. Every query stats the file first and reloads the
+    index if it has been replaced or modified since it was loaded.
+    """
+
+    def __init__(self, snapshot_filepath, cache_size=DEFAULT_CACHE_SIZE):
+        self.snapshot_filepath = os.path.abspath(snapshot_filepath)
+        self.cache_size = cache_size
+        self._lock = threading.Lock()
+        self._file = None
+        self._buffer = b""
+        self._signature = None
+        self._index = {}
+        try:
+            self._refresh()
+        except SnapshotUnavailableError as e:
+            # Start anyway; queries get 503 until the snapshot becomes readable.
+            print(f"Warning: {e}", file=sys.stderr)
+
+    @staticmethod
+    def _signature_of(stat):
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+    def _stat_signature(self):
+        return self._signature_of(os.stat(self.snapshot_filepath))
+
+    def _load(self):
+        """(Re)builds the index and mmap. Must be called with the lock held or from __init__."""
+        # The signature, the mapping and the index all come from one open file descriptor,
+        # so they describe the same inode even if the path is replaced meanwhile.
+        new_file = open(self.snapshot_filepath, "rb")
+        try:
+            signature = self._signature_of(os.fstat(new_file.fileno()))
+            if signature[2] > 0:
+                new_buffer = mmap.mmap(new_file.fileno(), 0, access=mmap.ACCESS_READ)
+                index = index_snapshot_lines(iter(new_buffer.readline, b""), self.snapshot_filepath)
+            else: # mmap cannot map an empty file
+                new_buffer = b""
+                index = {}
+        except Exception:
+            new_file.close()
+            raise
+
+        self.close()
+        self._file = new_file
+        self._buffer = new_buffer
+        self._signature = signature
+        self._index = index
+        self._read_content = functools.lru_cache(maxsize=self.cache_size)(self._decode_content)
+        print(f"Loaded {len(index)} files from snapshot: {self.snapshot_filepath}", file=sys.stderr)
+
+    def _refresh(self):
+        """
+        Reloads the snapshot if the file on disk has changed. If it can't be read, the
+        previously loaded snapshot keeps being served; SnapshotUnavailableError is raised
+        only if nothing has been loaded yet.
+        """
+        try:
+            if self._stat_signature() != self._signature:
+                self._load()
+        except (OSError, ValueError) as e:
+            if self._signature is None:
+                raise SnapshotUnavailableError(f"Cannot load snapshot {self.snapshot_filepath}: {e}")
+            # Keep serving the loaded snapshot while the file is briefly missing or unreadable
+            print(f"Warning: Could not reload snapshot {self.snapshot_filepath}: {e}", file=sys.stderr)
+
+    def _decode_content(self, path):
+        start, end = self._index[path]
+        return decode_snapshot_content(self._buffer[start:end])
+
+    def close(self):
+        if isinstance(self._buffer, mmap.mmap):
+            self._buffer.close()
+        if self._file is not None:
+            self._file.close()
+        self._file = None
+        self._buffer = b""
+
+    def get_content(self, path):
+        """Returns the content of a file in the snapshot, or None if it isn't there."""
+        with self._lock:
+            self._refresh()
+            if path not in self._index:
+                return None
+            return self._read_content(path)
+
+    def list_paths(self, pattern="*"):
+        """Returns the sorted snapshot paths matching a glob pattern."""
+        with self._lock:
+            self._refresh()
+            return sorted(path for path in self._index if fnmatch.fnmatch(path, pattern))
+
+    def get_hash(self, path):
+        """Returns {"path", "size", "sha256"} of a file as update.py would write it, or None."""
+        content = self.get_content(path)
+        if content is None:
+            return None
+        data = content.encode("utf-8")
+        return {"path": path, "size": len(data), "sha256": hashlib.sha256(data).hexdigest()}
+
+
+def make_handler(snapshot_index):
+    """Returns a request handler class serving queries against snapshot_index."""
+
+    class SnapshotRequestHandler(BaseHTTPRequestHandler):
+        """
+        GET /file?path=lib/main.dart   -> file content (text/plain)
+        GET /list?glob=lib/*.dart      -> {"paths": [...]}
+        GET /hash?path=lib/main.dart   -> {"path": ..., "size": ..., "sha256": ...}
+        """
+
+        def do_GET(self):
+            try:
+                self._handle_get()
+            except SnapshotUnavailableError as e:
+                self._send_error(503, str(e))
+
+        def _handle_get(self):
+            url = urlsplit(self.path)
+            query = parse_qs(url.query)
+            path = query.get("path", [None])[0]
+
+            if url.path == "/file":
+                content = snapshot_index.get_content(path) if path else None
+                if content is None:
+                    return self._send_error(404, f"File not in snapshot: {path}")
+                return self._send(200, "text/plain; charset=utf-8", content.encode("utf-8"))
+            if url.path == "/list":
+                paths = snapshot_index.list_paths(query.get("glob", ["*"])[0])
+                return self._send_json(200, {"paths": paths})
+            if url.path == "/hash":
+                info = snapshot_index.get_hash(path) if path else None
+                if info is None:
+                    return self._send_error(404, f"File not in snapshot: {path}")
+                return self._send_json(200, info)
+            return self._send_error(404, f"Unknown endpoint: {url.path}")
+
+        def _send(self, status, content_type, body):
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _send_json(self, status, payload):
+            self._send(status, "application/json", json.dumps(payload).encode("utf-8"))
+
+        def _send_error(self, status, message):
+            self._send_json(status, {"error": message})
+
+        def address_string(self):
+            # Unix socket clients have no (host, port) address.
+            return self.client_address[0] if self.client_address else "unix"
+
+    return SnapshotRequestHandler
+
+
+# Unix domain sockets are not available on every platform (e.g. older Windows Pythons).
+if hasattr(socketserver, "UnixStreamServer"):
+    class ThreadingUnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+        """HTTP over a Unix domain socket, one thread per connection."""
+        daemon_threads = True
+else:
+    ThreadingUnixHTTPServer = None
+
+
+def is_socket_file(path):
+    """Returns True if path exists and is a Unix domain socket (symlinks are not followed)."""
+    try:
+        return stat.S_ISSOCK(os.lstat(path).st_mode)
+    except OSError:
+        return False
+
+
+def serve(snapshot_filepath, host=DEFAULT_HOST, port=DEFAULT_PORT, unix_socket=None, cache_size=DEFAULT_CACHE_SIZE):
+    """Loads the snapshot and serves queries until interrupted."""
+    if unix_socket and ThreadingUnixHTTPServer is None:
+        raise RuntimeError("Unix domain sockets are not supported on this platform; use --host/--port instead.")
+    if unix_socket and os.path.lexists(unix_socket) and not is_socket_file(unix_socket):
+        raise FileExistsError(f"'{unix_socket}' exists and is not a socket; refusing to replace it.")
+    snapshot_index = SnapshotIndex(snapshot_filepath, cache_size)
+    handler = make_handler(snapshot_index)
+
+    if unix_socket:
+        if is_socket_file(unix_socket): # Stale socket left by a previous run
+            os.remove(unix_socket)
+        server = ThreadingUnixHTTPServer(unix_socket, handler)
+        print(f"Serving {snapshot_filepath} on unix socket {unix_socket}", file=sys.stderr)
+    else:
+        server = ThreadingHTTPServer((host, port), handler)
+        print(f"Serving {snapshot_filepath} on http://{host}:{server.server_address[1]}", file=sys.stderr)
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nServer stopped by user (Ctrl+C).", file=sys.stderr)
+    finally:
+        server.server_close()
+        snapshot_index.close()
+        if unix_socket and is_socket_file(unix_socket):
+            os.remove(unix_socket)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Serve file contents, glob listings and hashes from a project snapshot.\n"
+                    "Endpoints: /file?path=P, /list?glob=G, /hash?path=P",
+        formatter_class=argparse.RawTextHelpFormatter
+    )
+    parser.add_argument("snapshot", nargs="?", default=SNAPSHOT_FILE,
+                        help=f"The snapshot file to serve (default: {SNAPSHOT_FILE}).")
+    parser.add_argument("--host", default=DEFAULT_HOST,
+                        help=f"Host to listen on (default: {DEFAULT_HOST}).")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT,
+                        help=f"Port to listen on (default: {DEFAULT_PORT}).")
+    parser.add_argument("--unix", metavar="SOCKET_PATH", default=None,
+                        help="Listen on a Unix domain socket instead of TCP.")
+    parser.add_argument("--cache-size", type=int, default=DEFAULT_CACHE_SIZE,
+                        help=f"Number of decoded files kept in the LRU (default: {DEFAULT_CACHE_SIZE}).")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.snapshot):
+        print(f"Error: Snapshot file '{args.snapshot}' not found.")
+        sys.exit(1)
+    if args.unix and ThreadingUnixHTTPServer is None:
+        parser.error("--unix is not supported on this platform (no Unix domain sockets); use --host/--port")
+    if args.unix and os.path.lexists(args.unix) and not is_socket_file(args.unix):
+        parser.error(f"--unix path '{args.unix}' exists and is not a socket; refusing to replace it")
+
+    serve(args.snapshot, args.host, args.port, args.unix, args.cache_size)
@@ -1,19 +1,50 @@
 # apply_snapshot.py
 import os
+import re
 import sys
+import argparse
 
 # --- Configuration ---
 SNAPSHOT_FILE = "project_snapshot.txt"
 START_MARKER_PREFIX = "--- START OF FILE "
 END_MARKER_PREFIX = "--- END OF FILE "
 MARKER_SUFFIX = " ---"
+# Content markers written by packup.py size policies; such entries are partial and never applied.
+PARTIAL_CONTENT_MARKERS = ("[... packup: truncated ", "[packup: summarized, ")
+TRUNCATED_MARKER_RE = re.compile(r"\[\.\.\. packup: truncated \d+ of \d+ bytes \.\.\.\]")
 # --- End Configuration ---
 
 def parse_snapshot(snapshot_content):
     """
     Parses the snapshot content and yields (filename, file_content) tuples.
     """
-    lines = snapshot_content.splitlines() 
+    return parse_snapshot_lines(snapshot_content.splitlines())
+
+def parse_snapshot_stream(stream):
+    """
+    Parses a snapshot from a text or binary stream (or any iterable of lines) without
+    reading it into memory first. Yields (filename, file_content) tuples like parse_snapshot.
+    """
+    def stripped_lines():
+        for line in stream:
+            if isinstance(line, bytes):
+                line = line.decode("utf-8", errors="replace")
+            yield strip_line_ending(line)
+    return parse_snapshot_lines(stripped_lines())
+
+def strip_line_ending(line):
+    """Removes one trailing '\n', '\r\n' or '\r' (str or bytes), leaving other characters intact."""
+    newline, carriage_return = ("\n", "\r") if isinstance(line, str) else (b"\n", b"\r")
+    if line.endswith(newline):
+        line = line[:-1]
+    if line.endswith(carriage_return):
+        line = line[:-1]
+    return line
+
+def parse_snapshot_lines(lines):
+    """
+    Parses snapshot lines (without line endings) and yields (filename, file_content) tuples.
+    """
     current_file_lines = None
     current_filename = None
     # Keep track of filenames already yielded to handle malformed/duplicate entries robustly
@@ -67,26 +98,29 @@ def parse_snapshot(snapshot_content):
         print(f"Warning: Snapshot ended while processing file '{current_filename}'. Missing END_MARKER. File might be incomplete.")
         yield current_filename, "\n".join(current_file_lines)
 
-def update_project_from_snapshot(snapshot_filepath):
+def is_partial_content(file_content):
+    """Returns True if the content was truncated or summarized by packup.py size policies."""
+    if file_content.startswith(PARTIAL_CONTENT_MARKERS[1]):
+        return True
+    # Matched anywhere, not only at line starts, in case the marker was glued onto other text.
+    return TRUNCATED_MARKER_RE.search(file_content) is not None
+
+def apply_snapshot(source, project_root=None):
     """
-    Reads the snapshot file and updates the project files accordingly.
+    Writes snapshot entries into project_root (default: current directory) without prompting.
+    source is either a stream of snapshot text/bytes or an iterable of (filename, file_content) tuples,
+    so entries can come straight from packup.iter_pack_entries without touching a snapshot file.
+    Returns a dict with dirs_created, files_created and files_updated counts.
     """
-    try:
-        with open(snapshot_filepath, 'r', encoding='utf-8') as f:
-            snapshot_content = f.read()
-    except FileNotFoundError:
-        print(f"Error: Snapshot file '{snapshot_filepath}' not found.")
-        return
-    except Exception as e:
-        print(f"Error reading snapshot file '{snapshot_filepath}': {e}")
-        return
+    if hasattr(source, "read"):
+        source = parse_snapshot_stream(source)
 
-    project_root_abs = os.path.abspath(os.getcwd())
+    project_root_abs = os.path.abspath(project_root or os.getcwd())
     files_updated_count = 0
     files_created_count = 0
     dirs_created_count = 0
 
-    for filename, file_content in parse_snapshot(snapshot_content):
+    for filename, file_content in source:
         if not filename: # Should not happen with current parser, but a safeguard
             print("Warning: Encountered an entry with no filename. Skipping.")
             continue
@@ -94,12 +128,16 @@ def update_project_from_snapshot(snapshot_filepath):
         if filename == SNAPSHOT_FILE: # Don't let the snapshot overwrite itself
             print(f"Skipping update for '{filename}' (the snapshot file itself).")
             continue
+
+        if is_partial_content(file_content):
+            print(f"Skipping update for '{filename}' (truncated or summarized by packup, not full content).")
+            continue
         
         # Normalize path for the current OS
         filepath_to_write = os.path.normpath(filename)
         
         # Create an absolute path for the file to be written
-        abs_target_path = os.path.abspath(filepath_to_write)
+        abs_target_path = os.path.abspath(os.path.join(project_root_abs, filepath_to_write))
         
         # Security check: ensure the target path is truly within the project root
         # os.path.realpath resolves symbolic links for a more robust check
@@ -114,17 +152,16 @@ def update_project_from_snapshot(snapshot_filepath):
 
         print(f"Processing: {filepath_to_write}")
         try:
-            parent_dir = os.path.dirname(filepath_to_write)
-            if parent_dir: # Ensure parent_dir is not an empty string (for files in root)
-                if not os.path.exists(parent_dir):
-                    os.makedirs(parent_dir)
-                    print(f"  Created directory: {parent_dir}")
-                    dirs_created_count += 1
+            parent_dir = os.path.dirname(abs_target_path)
+            if not os.path.exists(parent_dir):
+                os.makedirs(parent_dir)
+                print(f"  Created directory: {os.path.dirname(filepath_to_write) or project_root_abs}")
+                dirs_created_count += 1
             
-            is_new_file = not os.path.exists(filepath_to_write)
+            is_new_file = not os.path.exists(abs_target_path)
 
             # Write the file, ensuring consistent LF ('\n') line endings
-            with open(filepath_to_write, 'w', encoding='utf-8', newline='\n') as f:
+            with open(abs_target_path, 'w', encoding='utf-8', newline='\n') as f:
                 f.write(file_content)
             
             if is_new_file:
@@ -141,40 +178,193 @@ def update_project_from_snapshot(snapshot_filepath):
         except Exception as e:
             print(f"  An unexpected error occurred with {filepath_to_write}: {e}")
 
+    return {
+        "dirs_created": dirs_created_count,
+        "files_created": files_created_count,
+        "files_updated": files_updated_count,
+    }
+
+def print_summary(counts):
+    """Prints the counts returned by apply_snapshot."""
     print("\n--- Summary ---")
-    print(f"Directories created: {dirs_created_count}")
-    print(f"Files created: {files_created_count}")
-    print(f"Files updated: {files_updated_count}")
+    print(f"Directories created: {counts['dirs_created']}")
+    print(f"Files created: {counts['files_created']}")
+    print(f"Files updated: {counts['files_updated']}")
+
+def update_project_from_snapshot(snapshot_filepath, project_root=None):
+    """
+    Reads the snapshot file and updates the project files accordingly.
+    """
+    try:
+        # Invalid UTF-8 becomes U+FFFD, as in the batched path (decode_snapshot_content),
+        # instead of failing part-way through after earlier entries were written.
+        f = open(snapshot_filepath, 'r', encoding='utf-8', errors='replace')
+    except FileNotFoundError:
+        print(f"Error: Snapshot file '{snapshot_filepath}' not found.")
+        return
+    except Exception as e:
+        print(f"Error reading snapshot file '{snapshot_filepath}': {e}")
+        return
+
+    with f:
+        counts = apply_snapshot(f, project_root)
+
+    print_summary(counts)
+
+def index_snapshot(snapshot_filepath, partial_files=None):
+    """
+    Scans a snapshot file once and returns {filename: (content_start, content_end)}, the byte
+    range of each file's content. Only marker lines are decoded; content is never held in memory.
+    Like parse_snapshot, the first block for a filename wins, and a block missing its END marker
+    runs up to the next START marker or the end of the file.
+    """
+    with open(snapshot_filepath, "rb") as f:
+        return index_snapshot_lines(f, snapshot_filepath, partial_files)
+
+def index_snapshot_lines(raw_lines, snapshot_filepath="<snapshot>", partial_files=None):
+    """
+    Builds the index_snapshot byte-range index from an iterable of raw byte lines read from the
+    start of a snapshot (an open binary file, or lines from an mmap). snapshot_filepath is only
+    used in warnings. If partial_files is a set, the names of blocks that is_partial_content would
+    reject (truncated or summarized by packup) are added to it during the same scan.
+    """
+    start_prefix = START_MARKER_PREFIX.encode("utf-8")
+    end_prefix = END_MARKER_PREFIX.encode("utf-8")
+    suffix = MARKER_SUFFIX.encode("utf-8")
+    index = {}
+    current_filename = None
+    content_start = 0
+    offset = 0
+
+    for line_idx, raw_line in enumerate(raw_lines):
+        line_start = offset
+        offset += len(raw_line)
+        line = raw_line.rstrip(b"\r\n")
+
+        if line.startswith(start_prefix) and line.endswith(suffix):
+            if current_filename:
+                print(f"Warning: New START_MARKER encountered before END_MARKER for '{current_filename}' (around line {line_idx+1} of {snapshot_filepath}). File '{current_filename}' might be incomplete.")
+                index[current_filename] = (content_start, line_start)
+            filename = line[len(start_prefix):line.rfind(suffix)].decode("utf-8", errors="replace")
+            if filename in index:
+                print(f"Warning: File '{filename}' (from line {line_idx+1} of {snapshot_filepath}) seems to be a duplicate entry in the snapshot. Skipping this block.")
+                current_filename = None
+            else:
+                current_filename = filename
+                content_start = offset
+
+        elif line.startswith(end_prefix) and line.endswith(suffix):
+            if current_filename:
+                end_filename = line[len(end_prefix):line.rfind(suffix)].decode("utf-8", errors="replace")
+                if end_filename != current_filename:
+                    print(f"Warning: Mismatched END_MARKER (around line {line_idx+1} of {snapshot_filepath}). Expected for '{current_filename}', got for '{end_filename}'. Content for '{current_filename}' might be corrupted or lost.")
+                index[current_filename] = (content_start, line_start)
+            current_filename = None
+
+        elif current_filename and partial_files is not None and b"packup: " in line:
+            text = line.decode("utf-8", errors="replace")
+            is_first_line = line_start == content_start
+            if (is_first_line and text.startswith(PARTIAL_CONTENT_MARKERS[1])) or TRUNCATED_MARKER_RE.search(text):
+                partial_files.add(current_filename)
+
+    if current_filename:
+        print(f"Warning: Snapshot {snapshot_filepath} ended while processing file '{current_filename}'. Missing END_MARKER. File might be incomplete.")
+        index[current_filename] = (content_start, offset)
+    return index
+
+def decode_snapshot_content(raw_content):
+    """
+    Decodes a byte range found by index_snapshot into the same text update_project_from_snapshot
+    applies. Only '\n', '\r\n' and '\r' are treated as line endings (bytes.splitlines), so
+    characters such as '\x0c' or U+2028 survive unchanged.
+    """
+    lines = (strip_line_ending(line) for line in raw_content.splitlines(keepends=True))
+    return b"\n".join(lines).decode("utf-8", errors="replace")
+
+def iter_batched_entries(snapshot_filepaths):
+    """
+    Merges an ordered list of snapshot files last-writer-wins and yields each distinct
+    (filename, file_content) exactly once. Every snapshot is indexed in one pass, then only
+    the winning byte ranges are read, in file order, with seek.
+    Entries apply_snapshot would skip (truncated/summarized content, the snapshot file itself)
+    never win, so an earlier full entry survives exactly as in sequential replay.
+    """
+    latest = {} # filename -> (snapshot index, content_start, content_end)
+    for snapshot_idx, snapshot_filepath in enumerate(snapshot_filepaths):
+        partial_files = set()
+        for filename, (start, end) in index_snapshot(snapshot_filepath, partial_files).items():
+            if filename == SNAPSHOT_FILE or filename in partial_files:
+                continue
+            latest[filename] = (snapshot_idx, start, end)
+
+    for snapshot_idx, snapshot_filepath in enumerate(snapshot_filepaths):
+        ranges = sorted((start, end, filename) for filename, (idx, start, end) in latest.items() if idx == snapshot_idx)
+        if not ranges:
+            continue
+        with open(snapshot_filepath, "rb") as f:
+            for start, end, filename in ranges:
+                f.seek(start)
+                yield filename, decode_snapshot_content(f.read(end - start))
+
+def update_project_from_snapshots(snapshot_filepaths, project_root=None):
+    """
+    Applies an ordered list of snapshot files (e.g. a series of partial "changed files only"
+    snapshots) as if applied one after another, but writes each final file only once.
+    """
+    for snapshot_filepath in snapshot_filepaths:
+        if not os.path.exists(snapshot_filepath):
+            print(f"Error: Snapshot file '{snapshot_filepath}' not found.")
+            return
+
+    print_summary(apply_snapshot(iter_batched_entries(snapshot_filepaths), project_root))
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description=f"Apply '{SNAPSHOT_FILE}' to the project in the current directory.",
+        formatter_class=argparse.RawTextHelpFormatter
+    )
+    parser.add_argument("snapshots", nargs="*", default=[SNAPSHOT_FILE],
+                        help=f"Snapshot files to apply, oldest first (default: {SNAPSHOT_FILE}). With several,\n"
+                             "they are merged last-writer-wins and each file is written once.")
+    parser.add_argument("-y", "--yes", action="store_true",
+                        help="Do not ask for confirmation before overwriting files.")
+    args = parser.parse_args()
+
     script_name = os.path.basename(sys.argv[0] or "apply_snapshot.py")
     print(f"--- Project Update Script ({script_name}) ---")
     
     current_working_dir = os.getcwd()
-    snapshot_file_full_path = os.path.join(current_working_dir, SNAPSHOT_FILE)
+    snapshot_file_full_paths = [os.path.join(current_working_dir, name) for name in args.snapshots]
 
-    if not os.path.exists(snapshot_file_full_path):
-        print(f"\nError: Snapshot file '{SNAPSHOT_FILE}' not found in the current directory ({current_working_dir}).")
-        print(f"Please ensure this script is run from your project's root directory and '{SNAPSHOT_FILE}' exists there.")
-        sys.exit(1)
+    for snapshot_name, snapshot_file_full_path in zip(args.snapshots, snapshot_file_full_paths):
+        if not os.path.exists(snapshot_file_full_path):
+            print(f"\nError: Snapshot file '{snapshot_name}' not found in the current directory ({current_working_dir}).")
+            print(f"Please ensure this script is run from your project's root directory and '{snapshot_name}' exists there.")
+            sys.exit(1)
 
-    print(f"\nThis script will read '{SNAPSHOT_FILE}' and update files in the current project directory:")
+    print(f"\nThis script will read {', '.join(repr(name) for name in args.snapshots)} and update files in the current project directory:")
     print(f"  {current_working_dir}")
     print("\nIMPORTANT: Ensure you have a backup or version control (like Git) in place before proceeding.")
     print("This operation will OVERWRITE existing files with content from the snapshot.")
     
-    try:
-        confirm = input("Are you sure you want to continue? (yes/no): ")
-    except KeyboardInterrupt:
-        print("\nUpdate cancelled by user (Ctrl+C).")
-        sys.exit(0)
+    if args.yes:
+        confirm = 'yes'
+    else:
+        try:
+            confirm = input("Are you sure you want to continue? (yes/no): ")
+        except KeyboardInterrupt:
+            print("\nUpdate cancelled by user (Ctrl+C).")
+            sys.exit(0)
         
     if confirm.lower() == 'yes':
         print("\nStarting project update...\n")
-        update_project_from_snapshot(snapshot_file_full_path)
+        if len(snapshot_file_full_paths) == 1:
+            update_project_from_snapshot(snapshot_file_full_paths[0])
+        else:
+            update_project_from_snapshots(snapshot_file_full_paths)
         print("\nProject update process finished.")
     else:
         print("\nUpdate cancelled by user.")
     
-    print("--------------------------------------")
\ No newline at end of file
+    print("--------------------------------------")
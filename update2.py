@@ -1,19 +1,25 @@
 import os
 import re
+import sys
 
-def apply_diff(diff_file_path="changes.txt"):
+def apply_diff(diff_file_path="changes.txt", diff_content=None):
     """
     Applies changes from a diff file to the project.
 
     Args:
         diff_file_path (str): Path to the diff file (e.g., 'changes.txt').
+        diff_content (str | iterable of str, optional): In-memory diff text or lines.
+            When given, it is applied directly and diff_file_path is not read.
     """
-    if not os.path.exists(diff_file_path):
+    if diff_content is not None:
+        if isinstance(diff_content, str):
+            diff_content = diff_content.splitlines(keepends=True)
+    elif not os.path.exists(diff_file_path):
         print(f"Error: Diff file '{diff_file_path}' not found.")
         return
-
-    with open(diff_file_path, 'r', encoding='utf-8') as f:
-        diff_content = f.readlines()
+    else:
+        with open(diff_file_path, 'r', encoding='utf-8') as f:
+            diff_content = f.readlines()
 
     current_file_path = None
     original_lines = []
@@ -162,8 +168,8 @@ def apply_diff(diff_file_path="changes.txt"):
 
     print("Diff application process finished.")
 
-if __name__ == "__main__":
-    # Create a dummy project structure for testing
+def create_demo_files():
+    """Creates a dummy project structure for trying out apply_diff."""
     # Test file 1
     if not os.path.exists("src"):
         os.makedirs("src")
@@ -181,35 +187,46 @@ if __name__ == "__main__":
     with open("src/empty_to_fill.txt", "w") as f:
         pass
 
+if __name__ == "__main__":
+    # Usage: python update2.py [diff_file] [--demo]
+    # --demo creates dummy files under src/ first and prints them afterwards.
+    cli_args = [a for a in sys.argv[1:] if a != "--demo"]
+    run_demo = "--demo" in sys.argv[1:]
+    diff_file = cli_args[0] if cli_args else "changes.txt"
+
+    if run_demo:
+        create_demo_files()
+
     print("----- APPLYING  DIFF -----")
-    apply_diff("changes.txt")
+    apply_diff(diff_file)
     print("----- FINISHED APPLYING  DIFF -----")
 
-    # Verify (optional)
-    print("\nContents of src/example.txt after diff:")
-    if os.path.exists("src/example.txt"):
-        with open("src/example.txt", "r") as f:
-            print(f.read())
-    else:
-        print("src/example.txt not found.")
-
-    print("\nContents of src/new_file.txt after diff:")
-    if os.path.exists("src/new_file.txt"):
-        with open("src/new_file.txt", "r") as f:
-            print(f.read())
-    else:
-        print("src/new_file.txt not found.")
+    if run_demo:
+        # Verify (optional)
+        print("\nContents of src/example.txt after diff:")
+        if os.path.exists("src/example.txt"):
+            with open("src/example.txt", "r") as f:
+                print(f.read())
+        else:
+            print("src/example.txt not found.")
+
+        print("\nContents of src/new_file.txt after diff:")
+        if os.path.exists("src/new_file.txt"):
+            with open("src/new_file.txt", "r") as f:
+                print(f.read())
+        else:
+            print("src/new_file.txt not found.")
     
-    print("\nContents of src/empty_to_fill.txt after diff:")
-    if os.path.exists("src/empty_to_fill.txt"):
-        with open("src/empty_to_fill.txt", "r") as f:
-            print(f.read())
-    else:
-        print("src/empty_to_fill.txt not found.")
-
-    # Clean up dummy files
-    # os.remove("changes.txt")
-    # os.remove("src/example.txt")
-    # if os.path.exists("src/new_file.txt"): os.remove("src/new_file.txt")
-    # if os.path.exists("src/empty_to_fill.txt"): os.remove("src/empty_to_fill.txt")
-    # if os.path.exists("src"): os.rmdir("src") # only if empty
\ No newline at end of file
+        print("\nContents of src/empty_to_fill.txt after diff:")
+        if os.path.exists("src/empty_to_fill.txt"):
+            with open("src/empty_to_fill.txt", "r") as f:
+                print(f.read())
+        else:
+            print("src/empty_to_fill.txt not found.")
+
+        # Clean up dummy files
+        # os.remove("changes.txt")
+        # os.remove("src/example.txt")
+        # if os.path.exists("src/new_file.txt"): os.remove("src/new_file.txt")
+        # if os.path.exists("src/empty_to_fill.txt"): os.remove("src/empty_to_fill.txt")
+        # if os.path.exists("src"): os.rmdir("src") # only if empty
\ No newline at end of file